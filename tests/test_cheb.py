@@ -1,5 +1,5 @@
 import numpy as np
-from yroots.polynomial import MultiCheb, MultiPower, poly2cheb, cheb2poly
+from yroots.polynomial import MultiCheb, MultiPower, poly2cheb, cheb2poly, clenshaw_nd_batch
 import pytest
 import pdb
 
@@ -87,6 +87,18 @@ def test_evaluate2():
     value = cheb((2,5))
     assert(np.isclose(value, 656.5))
 
+def test_clenshaw_nd_batch():
+    coeff = np.array([[0,0,0,1],[0,0,0,0],[0,0,1,0]])
+    values = clenshaw_nd_batch(coeff, [[2,5],[.25,.5],[1.2,2.2]])
+    assert(np.allclose(values, [828,-.5625,52.3104]))
+
+    np.random.seed(12)
+    cheb = MultiCheb(np.random.randn(3,4,5))
+    points = np.random.uniform(-1,1,(10,3)) + 1j*np.random.uniform(-1,1,(10,3))
+    single = np.array([cheb(point) for point in points]).ravel()
+    assert(np.allclose(clenshaw_nd_batch(cheb.coeff, points), single))
+    assert(np.allclose(cheb(points), single))
+
 def test_evaluate_grid1():
     poly = MultiCheb(np.array([[2,0,3],
                                 [0,-1,0],
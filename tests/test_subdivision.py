@@ -12,18 +12,14 @@ def correctZeros(polys, a, b):
     of the zeros are correct (so it will pass even on bad random runs)
     '''
     zeros = subdiv.solve(polys, a, b)
-    correct = 0
-    outOfRange = 0
-    for zero in zeros:
-        good = True
-        for poly in polys:
-            if not np.isclose(0, poly(zero), atol = 1.e-3):
-                good = False
-                if (np.abs(zero) > 1).any():
-                    outOfRange += 1
-                break
-        if good:
-            correct += 1
+    if len(zeros) == 0:
+        raise Exception("No zeros found")
+    #Evaluate each polynomial at all the zeros at once instead of one zero at a time.
+    zeros = np.asarray(zeros)
+    vals = np.array([np.atleast_1d(poly(zeros)) for poly in polys])
+    good = np.all(np.abs(vals) <= 1.e-3, axis=0)
+    correct = np.sum(good)
+    outOfRange = np.sum(~good & (np.abs(zeros.reshape(len(zeros),-1)) > 1).any(axis=1))
     if len(zeros) == outOfRange:
         raise Exception("No zeros found")
     else:
@@ -242,3 +242,113 @@ def test_mon_combos():
             mons2.append(i)
     for i in range(len(mons)):
         assert((mons[i] == mons2[i]).all())
+
+def test_mon_combosHighest():
+    '''
+    Tests the mon_combosHighest function against the simpler itertools product.
+    '''
+    for deg, dim in [(5,2), (4,3), (3,5), (0,3), (6,1)]:
+        mons = mon_combosHighest(np.zeros(dim, dtype = int),deg)
+        mons2 = list()
+        for i in product(np.arange(deg+1), repeat=dim):
+            if np.sum(i) == deg:
+                mons2.append(i)
+        assert(len(mons) == len(mons2))
+        for i in range(len(mons)):
+            assert((mons[i] == mons2[i]).all())
+
+def test_grevlex_argsort():
+    '''
+    Tests that grevlex_argsort agrees with sorting Term objects.
+    '''
+    np.random.seed(17)
+    for dim in range(1,5):
+        #Exponents past 15 can't be packed, so this covers the fallback comparison too.
+        mons = np.random.randint(0, 4, (40,dim))
+        mons[::3] *= 6
+        order = grevlex_argsort(mons)
+        terms = sorted(Term(mon) for mon in mons)
+        for i in range(len(mons)):
+            assert(tuple(mons[order[i]]) == terms[i].val)
+
+def test_row_swap_matrix():
+    A = np.array([[0,2,0,2],[0,1,3,0],[1,2,3,4]])
+    assert((row_swap_matrix(A) == np.array([[1,2,3,4],[0,2,0,2],[0,1,3,0]])).all())
+
+    # Ties keep their order and rows of zeros go to the bottom.
+    B = np.array([[0,0,0],[0,5,1],[2,0,0],[0,3,0]])
+    assert((row_swap_matrix(B) == np.array([[2,0,0],[0,5,1],[0,3,0],[0,0,0]])).all())
+
+def test_clean_zeros_from_matrix():
+    A = np.array([[1e-12, -1e-11, .5],[-2., 3e-10, -1e-13]])
+    B = clean_zeros_from_matrix(A)
+    assert(B is A)
+    assert((A == np.array([[0, 0, .5],[-2., 3e-10, 0]])).all())
+
+def test_match_poly_dimensions():
+    np.random.seed(4)
+    A = MultiPower(np.random.rand(3,4))
+    B = MultiCheb(np.random.rand(2,2,2))
+    A_new, B_new = match_poly_dimensions([A,B])
+    A_ref = MultiPower(A_new.coeff)
+    assert(A_new.dim == 3 and A_new.shape == (1,3,4))
+    assert(tuple(A_new.lead_term) == tuple(A_ref.lead_term))
+    assert(A_new.degree == A_ref.degree and A_new.lead_coeff == A_ref.lead_coeff)
+    assert(B_new is B and B.shape == (2,2,2))
+
+def test_match_size():
+    np.random.seed(5)
+    A = np.random.rand(3,1,4)
+    B = np.random.rand(2,5,2)
+    A_new, B_new = match_size(A, B)
+    assert(A_new.shape == B_new.shape == (3,5,4))
+    for old, new in ((A,A_new),(B,B_new)):
+        ref = np.zeros((3,5,4))
+        ref[slice_top(old)] = old
+        assert((new == ref).all())
+    A_same, _ = match_size(A, A)
+    assert((A_same == A).all() and A_same is not A)
+
+def test_leading_indices():
+    A = np.array([[0.,0.,3.],[1.,0.,0.],[0.,0.,0.],[0.,1e-12,2.]])
+    assert((leading_indices(A) == np.array([2,0,3,1])).all())
+    assert((leading_indices(A, 1e-10) == np.array([2,0,3,2])).all())
+    assert((leading_indices(np.array([[0,2],[5,0]])) == np.array([1,0])).all())
+
+def test_mon_combos_into():
+    dim, deg = 3, 4
+    out = np.zeros((num_mons_full(deg, dim)+2, dim), dtype=int)
+    assert(mon_combos_into(dim, deg, out) == num_mons_full(deg, dim))
+    assert((out[:-2] == np.array(mon_combos([0]*dim, deg))).all())
+    assert((out[-2:] == 0).all())
+
+    out = np.empty((num_mons(deg, dim), dim), dtype=int)
+    mon_combos_into(dim, deg, out[::-1], highest=True)
+    assert((out == np.array(mon_combosHighest([0]*dim, deg))[::-1]).all())
+
+def test_mons_ordered():
+    for deg in [0,1,2,6]:
+        mons = mons_ordered(3, deg)
+        mons2 = np.vstack([mon_combosHighest([0]*3, d) for d in range(deg+1)])
+        assert((mons == mons2).all())
+
+def test_sort_polys_by_degree():
+    np.random.seed(7)
+    # More polynomials than the sorted() cutoff, with lots of ties in degree.
+    polys = [MultiPower(np.array([1.]*(d+1))) for d in np.random.randint(0, 5, 10**4+50)]
+    degs = np.array([poly.degree for poly in polys])
+
+    ascending = sort_polys_by_degree(polys)
+    assert(len(ascending) == len(polys))
+    assert((np.diff([poly.degree for poly in ascending]) >= 0).all())
+    # Ties stay in their original order.
+    for d in range(5):
+        ties = [poly for poly in ascending if poly.degree == d]
+        assert(all(p is q for p, q in zip(ties, [polys[i] for i in np.where(degs == d)[0]])))
+
+    descending = sort_polys_by_degree(polys, ascending=False)
+    assert(all(p is q for p, q in zip(descending, ascending[::-1])))
+
+def test_mon_combos_into_too_small():
+    with pytest.raises(ValueError):
+        mon_combos_into(3, 4, np.empty((num_mons_full(4, 3)-1, 3), dtype=int))
@@ -5,8 +5,8 @@ from yroots.LinearProjection import nullspace
 from yroots.polynomial import MultiCheb, MultiPower, is_power
 from yroots.MacaulayReduce import reduce_macaulay_qrt, find_degree, \
                               add_polys, reduce_macaulay_tvb, reduce_macaulay_svd
-from yroots.utils import row_swap_matrix, MacaulayError, slice_top, get_var_list, \
-                              mon_combos, mon_combosHighest, sort_polys_by_degree, \
+from yroots.utils import row_swap_matrix, MacaulayError, get_var_list, \
+                              slice_top, mons_ordered, num_mons, sort_polys_by_degree, \
                               deg_d_polys, all_permutations_cheb, ConditioningError,\
                               newton_polish, condeigs, TooManyRoots
 import warnings
@@ -556,7 +556,7 @@ def create_matrix(poly_coeffs, degree, dim, varsToRemove):
         slices = slice_top(coeff)
         added_zeros[slices] = coeff
         flat_polys.append(added_zeros[tuple(matrix_term_indexes)])
-        added_zeros[slices] = np.zeros_like(coeff)
+        added_zeros[slices] = 0
     del poly_coeffs
 
     #Make the matrix. Reshape is faster than stacking.
@@ -584,25 +584,16 @@ def sorted_matrix_terms(degree, dim, varsToRemove):
     cuts : int
         Number of monomials of highest degree
     '''
-    highest_mons = mon_combosHighest([0]*dim,degree)[::-1]
-
-    other_mons = list()
-    d = degree - 1
-    while d > 1:
-        other_mons += mon_combosHighest([0]*dim,d)[::-1]
-        d -= 1
-
-    #extra-small monomials: 1,x,y, etc.
-    xs_mons = mon_combos([0]*dim,1)[::-1]
+    #Highest degree first, down to the extra-small monomials 1,x,y, etc. This is the graded
+    #order reversed. Copied because the reductions permute matrix_terms in place.
+    matrix_terms = mons_ordered(dim, degree)[::-1].copy()
 
     #trivial case
     if degree == 1:
-        matrix_terms = np.reshape(xs_mons, (len(xs_mons),dim))
-        cuts = 0
+        cut = 0
     #normal case
     else:
-        matrix_terms = np.reshape(highest_mons+other_mons+xs_mons, (len(highest_mons+other_mons+xs_mons),dim))
-        cut = len(highest_mons)
+        cut = num_mons(degree, dim)
 
     # for var in varsToRemove:
     #     B = matrix_terms[cuts[0]:]
@@ -3,10 +3,10 @@ import itertools
 from numpy.polynomial import chebyshev as cheb
 from numpy.polynomial import polynomial as poly
 from scipy.signal import fftconvolve, convolve
-from yroots.utils import Term, makePolyCoeffMatrix, match_size, slice_top, slice_bottom
+from yroots.utils import grevlex_argsort, makePolyCoeffMatrix, match_size, slice_top, slice_bottom
 import time
 
-from numba import jit
+from numba import jit, njit, prange
 
 # @jit(cache=True)
 def polyval(x, cc): #pragma: no cover
@@ -58,6 +58,54 @@ def chebval2(x, cc): #pragma: no cover
             c1 = tmp + c1*x2
     return c0 + c1*x
 
+@njit(parallel=True, cache=True)
+def _clenshaw_nd_batch(coeff, shape, points):
+    n_points, dim = points.shape
+    out = np.empty_like(points[:,0])
+    for p in prange(n_points):
+        c = coeff
+        size = coeff.size
+        #Contract one axis at a time, starting from the last, with the 1D recurrence.
+        for axis in range(dim-1, -1, -1):
+            k = shape[axis]
+            x = points[p,axis]
+            size = size//k
+            new = np.empty_like(c[:size])
+            for row in range(size):
+                b1 = c[0]*0
+                b2 = b1
+                for j in range(k-1, 0, -1):
+                    tmp = b1
+                    b1 = 2*x*b1 - b2 + c[row*k+j]
+                    b2 = tmp
+                new[row] = x*b1 - b2 + c[row*k]
+            c = new
+        out[p] = c[0]
+    return out
+
+def clenshaw_nd_batch(coeff, points):
+    '''
+    Evaluates a Chebyshev polynomial at many points at once with a compiled Clenshaw recurrence.
+
+    Parameters
+    ----------
+    coeff : ndarray
+        The Chebyshev coefficients, with axis i for variable i.
+    points : array-like
+        The points to evaluate at, one per row.
+
+    Returns
+    -------
+    values : ndarray
+        The polynomial evaluated at each point.
+    '''
+    points = np.asarray(points)
+    dtype = np.result_type(coeff, points, np.float64)
+    shape = np.array(coeff.shape, dtype=np.int64)
+    points = np.ascontiguousarray(points, dtype=dtype).reshape(-1, coeff.ndim)
+    coeff = np.ascontiguousarray(coeff, dtype=dtype).ravel()
+    return _clenshaw_nd_batch(coeff, shape, points)
+
 def getPoly(deg,dim,power,pcnt_sparse=None,integer=False,maxint=10):
     '''
     A helper function for testing. Returns a random upper triangular polynomial of the given dimension and degree.
@@ -192,11 +240,9 @@ class Polynomial(object):
                     change = True
 
     def update_lead_term(self):
-        non_zeros = list()
-        for i in zip(*np.where(self.coeff != 0)):
-            non_zeros.append(Term(i))
+        non_zeros = np.argwhere(self.coeff != 0)
         if len(non_zeros) != 0:
-            self.lead_term = max(non_zeros).val
+            self.lead_term = tuple(non_zeros[grevlex_argsort(non_zeros)[-1]])
             self.degree = sum(self.lead_term)
             self.lead_coeff = self.coeff[self.lead_term]
         else:
@@ -522,16 +568,17 @@ class MultiCheb(Polynomial):
         '''
         points = super(MultiCheb, self).__call__(points)
 
+        #Many points at once are faster through the compiled recurrence.
+        if len(points) > 1:
+            return clenshaw_nd_batch(self.coeff, points)
+
         c = self.coeff
         n = c.ndim
         cc = c.reshape(c.shape + (1,)*points.ndim)
         c = chebval2(points[:,0],cc)
         for i in range(1,n):
             c = chebval(points[:,i],c)
-        if len(c) == 1:
-            return c[0]
-        else:
-            return c
+        return c[0]
 
     def evaluate_grid(self, xyz):
         '''
@@ -12,7 +12,8 @@ from yroots.OneDimension import divCheb,divPower,multCheb,multPower,solve
 from yroots.Division import division
 from yroots.Multiplication import multiplication
 from yroots.utils import clean_zeros_from_matrix, slice_top, MacaulayError, \
-                        get_var_list, ConditioningError, TooManyRoots, Tolerances
+                        get_var_list, ConditioningError, TooManyRoots, Tolerances, \
+                        leading_indices
 from yroots.polynomial import MultiCheb
 from yroots.IntervalChecks import IntervalData
 from yroots.RootTracker import RootTracker
@@ -556,7 +557,7 @@ def solve_linear(coeffs):
             # is a pivot column, system is inconsistent
             # otherwise, it's dependent
             U = lu(np.hstack((A,B.reshape(-1,1))))[2]
-            pivot_columns = [np.flatnonzero(U[i, :])[0] for i in range(U.shape[0]) if np.flatnonzero(U[i, :]).shape[0]>0]
+            pivot_columns = leading_indices(U)
             if not (U.shape[1]-1 in pivot_columns):
                 #independent
                 warnings.warn('System potentially has infinitely many roots')
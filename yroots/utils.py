@@ -1,9 +1,31 @@
 # A collection of functions used in the F4 Macaulay and TVB solvers
 import numpy as np
 import itertools
+import numbers
+from functools import lru_cache
+from operator import attrgetter
 from scipy.linalg import qr, solve_triangular, svd, norm, eig
-from scipy.special import comb
+from scipy.special import comb as _array_comb
+from numba import njit, prange
 import time
+try:
+    from math import comb as _scalar_comb
+except ImportError: #Python < 3.8
+    def _scalar_comb(n, k):
+        return _array_comb(n, k, exact=True)
+
+def comb(n, k):
+    '''Binomial coefficient n choose k.
+
+    Integer arguments go through the exact C implementation in the math module and give 0
+    when k is out of range, like scipy. Anything else falls back to scipy.special.comb.
+    '''
+    if isinstance(n, numbers.Integral) and isinstance(k, numbers.Integral):
+        n, k = int(n), int(k)
+        if n < 0 or k < 0:
+            return 0
+        return _scalar_comb(n, k)
+    return _array_comb(n, k, exact=False)
 
 class InstabilityWarning(Warning):
     pass
@@ -37,12 +59,57 @@ class TooManyRoots(Exception):
     def __init__(self, message):
         self.message = message
 
+@njit(cache=True)
+def _grevlex_lt(a, b, da, db):
+    '''Compiled grevlex less-than on two exponent arrays with precomputed degrees.'''
+    if da != db:
+        return da < db
+    for k in range(len(a)-1, -1, -1):
+        if a[k] < b[k]:
+            return False
+        if a[k] > b[k]:
+            return True
+    return False
+
+def grevlex_argsort(exponents):
+    '''Finds the order that sorts a set of monomials in ascending grevlex order.
+
+    Parameters
+    ----------
+    exponents : numpy array
+        An array of shape (N, dim), each row of which is a monomial.
+
+    Returns
+    -------
+    order : numpy array
+        The indexes that sort the rows of exponents, smallest monomial first.
+    '''
+    exponents = np.asarray(exponents)
+    #np.lexsort treats the last key as the primary one: total degree first, then
+    #the exponents from the last variable to the first, where bigger is smaller.
+    keys = np.vstack((-exponents.T, exponents.sum(axis=1)))
+    return np.lexsort(keys)
+
 class Term(object):
     '''
     Terms are just tuples of exponents with the grevlex ordering
     '''
+    #Lots of terms get made while building Macaulay matrices, so skip the per-instance dict.
+    __slots__ = ('val', 'arr', 'deg', 'packed')
+
     def __init__(self,val):
-        self.val = tuple(val)
+        self.val = val if type(val) is tuple else tuple(val)
+        self.deg = sum(self.val)
+        #Only needed by the _grevlex_lt fallback, so it is built on first use.
+        self.arr = None
+        #For small exponents, pack them 4 bits each into one integer with the last variable
+        #in the highest bits, so a grevlex tie-break is a single integer comparison.
+        self.packed = None
+        if len(self.val) <= 16 and all(0 <= e <= 15 for e in self.val):
+            packed = 0
+            for e in reversed(self.val):
+                packed = (packed << 4) | int(e)
+            self.packed = packed
 
     def __repr__(self):
         return str(self.val) + ' with grevlex order'
@@ -52,17 +119,16 @@ class Term(object):
         Redfine less-than according to grevlex
         '''
         if order == 'grevlex': #Graded Reverse Lexographical Order
-            if sum(self.val) < sum(other.val):
-                return True
-            elif sum(self.val) > sum(other.val):
-                return False
-            else:
-                for i,j in zip(reversed(self.val),reversed(other.val)):
-                    if i < j:
-                        return False
-                    if i > j:
-                        return True
-                return False
+            #Most comparisons are settled by the cached total degree.
+            if self.deg != other.deg:
+                return self.deg < other.deg
+            if self.packed is not None and other.packed is not None:
+                return self.packed > other.packed
+            if self.arr is None:
+                self.arr = np.asarray(self.val, dtype=np.int32)
+            if other.arr is None:
+                other.arr = np.asarray(other.val, dtype=np.int32)
+            return _grevlex_lt(self.arr, other.arr, self.deg, other.deg)
         elif order == 'lexographic': #Lexographical Order
             for i,j in zip(self.val,other.val):
                 if i < j:
@@ -71,9 +137,9 @@ class Term(object):
                     return False
             return False
         elif order == 'grlex': #Graded Lexographical Order
-            if sum(self.val) < sum(other.val):
+            if self.deg < other.deg:
                 return True
-            elif sum(self.val) > sum(other.val):
+            elif self.deg > other.deg:
                 return False
             else:
                 for i,j in zip(self.val,other.val):
@@ -86,16 +152,16 @@ class Term(object):
     # Define the other relations in grevlex order
 
     def __eq__(self, other):
-        return self.val == other.val
+        return self.deg == other.deg and self.val == other.val
 
     def __gt__(self, other):
-        return not(self < other or self == other)
+        return other < self
 
     def __ge__(self, other):
-        return (self > other or self == other)
+        return not self < other
 
     def __le__(self,other):
-        return (self < other or self == other)
+        return not other < self
 
     #Makes terms hashable so they can go in a set
     def __hash__(self):
@@ -115,7 +181,8 @@ def clean_zeros_from_matrix(array, accuracy=1.e-10):
     array : numpy array
         Same array, but with values less than the given accuracy set to 0.
     '''
-    array[(array < accuracy) & (array > -accuracy)] = 0
+    #Multiplying by the mask in place is a single fused pass, unlike a masked scatter.
+    np.multiply(array, np.abs(array) >= accuracy, out=array)
     return array
 
 def divides(mon1, mon2):
@@ -234,6 +301,35 @@ def sorted_polys_monomial(polys):
     sorted_polys = [polys[i] for i in argsort_list]
     return sorted_polys
 
+@njit(parallel=True, cache=True)
+def leading_indices(matrix, tol=0.):
+    '''Finds the column of the first nonzero entry in each row of a matrix.
+
+    Each row is scanned only up to its first nonzero, so nothing the size of the
+    matrix is allocated.
+
+    Parameters
+    ----------
+    matrix : 2D numpy array
+        The matrix of interest.
+    tol : float, optional
+        Entries with absolute value no bigger than this count as zero. Defaults to 0.
+
+    Returns
+    -------
+    1D numpy array
+        The index of the leading entry of each row. Rows with no nonzero entries
+        get the number of columns.
+    '''
+    m, n = matrix.shape
+    out = np.full(m, n, dtype=np.int64)
+    for i in prange(m):
+        for j in range(n):
+            if abs(matrix[i,j]) > tol:
+                out[i] = j
+                break
+    return out
+
 def row_swap_matrix(matrix):
     '''Rearrange the rows of matrix so it is close to upper traingular.
 
@@ -255,20 +351,17 @@ def row_swap_matrix(matrix):
            [0, 2, 0, 2],
            [0, 1, 3, 0]])
     '''
-    leading_mon_columns = list()
-    for row in matrix:
-        leading_mon_columns.append(np.where(row!=0)[0][0])
-    return matrix[np.argsort(leading_mon_columns)]
+    #Rows of all zeros go to the bottom.
+    leading_mon_columns = leading_indices(matrix)
+    return matrix[np.argsort(leading_mon_columns, kind='mergesort')]
 
+@lru_cache(maxsize=None)
 def get_var_list(dim):
-    '''Returns a list of the variables [x_1, x_2, ..., x_n] as tuples.'''
-    _vars = []
-    var = [0]*dim
-    for i in range(dim):
-        var[i] = 1
-        _vars.append(tuple(var))
-        var[i] = 0
-    return _vars
+    '''Returns the variables (x_1, x_2, ..., x_n) as tuples.
+
+    The result is cached by dim, so it is a tuple of tuples that callers can't modify.
+    '''
+    return tuple(tuple(int(x) for x in row) for row in np.eye(dim, dtype=np.int8))
 
 def row_linear_dependencies(matrix, accuracy=1.e-10):
     '''
@@ -460,6 +553,15 @@ def makePolyCoeffMatrix(inputString):
         matrix[tuple(matrixSpot)] = coefficient
     return matrix
 
+#The slices only depend on the shape, and the same few shapes come up over and over.
+@lru_cache(maxsize=None)
+def _slices_top(shape):
+    return tuple(slice(0,i) for i in shape)
+
+@lru_cache(maxsize=None)
+def _slices_bottom(shape):
+    return tuple(slice(-i,None) for i in shape)
+
 def slice_top(matrix):
     ''' Gets the n-d slices needed to slice a matrix into the top corner of another.
 
@@ -469,13 +571,10 @@ def slice_top(matrix):
         The matrix of interest.
     Returns
     -------
-    slices : list
-        Each value of the list is a slice of the matrix in some dimension. It is exactly the size of the matrix.
+    slices : tuple
+        Each value of the tuple is a slice of the matrix in some dimension. It is exactly the size of the matrix.
     '''
-    slices = list()
-    for i in matrix.shape:
-        slices.append(slice(0,i))
-    return tuple(slices)
+    return _slices_top(matrix.shape)
 
 def slice_bottom(matrix):
     ''' Gets the n-d slices needed to slice a matrix into the bottom corner of another.
@@ -486,13 +585,10 @@ def slice_bottom(matrix):
         The matrix of interest.
     Returns
     -------
-    slices : list
-        Each value of the list is a slice of the matrix in some dimension. It is exactly the size of the matrix.
+    slices : tuple
+        Each value of the tuple is a slice of the matrix in some dimension. It is exactly the size of the matrix.
     '''
-    slices = list()
-    for i in matrix.shape:
-        slices.append(slice(-i,None))
-    return tuple(slices)
+    return _slices_bottom(matrix.shape)
 
 def match_poly_dimensions(polys):
     '''Matches the dimensions of a list of polynomials.
@@ -511,10 +607,15 @@ def match_poly_dimensions(polys):
     new_polys = list()
     for poly in polys:
         if poly.dim != dim:
-            coeff_shape = list(poly.shape)
-            for i in range(dim - poly.dim):
-                coeff_shape.insert(0,1)
-            poly.__init__(poly.coeff.reshape(coeff_shape))
+            #Adding leading axes of length 1 doesn't change the degree, lead_coeff, or which term
+            #leads, so just update the attributes instead of rerunning the constructor.
+            added = dim - poly.dim
+            poly.coeff = poly.coeff.reshape((1,)*added + tuple(poly.shape))
+            poly.shape = poly.coeff.shape
+            poly.dim = dim
+            poly.jac = None
+            if poly.lead_term is not None:
+                poly.lead_term = (0,)*added + tuple(poly.lead_term)
         new_polys.append(poly)
     return new_polys
 
@@ -532,13 +633,18 @@ def match_size(a,b):
     a, b : ndarray
         Matrixes of equal size.
     '''
-    new_shape = np.maximum(a.shape, b.shape)
-
-    a_new = np.zeros(new_shape)
-    a_new[slice_top(a)] = a
-    b_new = np.zeros(new_shape)
-    b_new[slice_top(b)] = b
-    return a_new, b_new
+    new_shape = tuple(np.maximum(a.shape, b.shape))
+    return _pad_with_zeros(a, new_shape), _pad_with_zeros(b, new_shape)
+
+def _pad_with_zeros(a, shape):
+    '''Copies a into the top corner of a new array of the given shape, zeroing only the rest.'''
+    new = np.empty(shape)
+    new[slice_top(a)] = a
+    #The part outside a is the union of one slab per dimension that grew.
+    for i, (old_size, new_size) in enumerate(zip(a.shape, shape)):
+        if old_size < new_size:
+            new[(slice(None),)*i + (slice(old_size, None),)] = 0
+    return new
 
 def _fold_in_i_dir(solution_matrix, dim, fdim, size_in_fdim, fold_idx):
     """
@@ -670,74 +776,149 @@ def mon_mult2(matrix, mon, power):
             idx_zeros[i] = 0
         return matrix
 
-def mon_combosHighest(mon, numLeft, spot = 0):
-    '''Finds all the monomials of a given degree and returns them. Works recursively.
+@lru_cache(maxsize=256)
+def mon_combos_highest_fast(dim, deg):
+    '''Finds all the monomials of a given degree and dimension without recursion.
+
+    Uses the stars-and-bars bijection: each choice of dim-1 bar positions among deg+dim-1
+    slots corresponds to exactly one monomial, and the consecutive gaps between the bars
+    are its exponents. Walking the bar positions in lexographic order gives the monomials
+    in lexographic order, the same order the recursive version produces.
+
+    The same (dim, deg) pairs are asked for over and over while building Macaulay matrices,
+    so results are cached. The returned array is shared and read-only; copy it to modify it.
+
+    Parameters
+    ----------
+    dim : int
+        The dimension of the desired monomials.
+    deg : int
+        The degree of the desired monomials.
+
+    Returns
+    -------
+    mons : numpy array
+        An array of shape (N, dim), each row of which is a monomial.
+    '''
+    num = comb(deg+dim-1, dim-1)
+    bars = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(deg+dim-1), dim-1)),
+                       dtype=int, count=num*(dim-1)).reshape(num, dim-1)
+    bars = np.hstack((np.full((num,1), -1), bars, np.full((num,1), deg+dim-1)))
+    mons = np.diff(bars, axis=1) - 1
+    mons.flags.writeable = False
+    return mons
+
+def mon_combos_fast(dim, deg):
+    '''Finds all the monomials up to a given degree and dimension without recursion.
+
+    A monomial of degree at most deg is a monomial of degree exactly deg with one extra
+    slack variable dropped, so this is mon_combos_highest_fast in dim+1 with the last
+    column removed. The result is a read-only view of the cached array.
+
+    Parameters
+    ----------
+    dim : int
+        The dimension of the desired monomials.
+    deg : int
+        The maximum degree of the desired monomials.
+
+    Returns
+    -------
+    mons : numpy array
+        An array of shape (N, dim), each row of which is a monomial.
+    '''
+    return mon_combos_highest_fast(dim+1, deg)[:,:-1]
+
+@njit(cache=True)
+def _mon_combos_into(dim, deg, out, highest):
+    #Walk the monomials of degree exactly deg in lexographic order. Without highest, an
+    #extra slack variable at the end takes up the unused degree and isn't written out.
+    size = dim if highest else dim+1
+    mon = np.zeros(size, dtype=np.int64)
+    mon[size-1] = deg
+    num = 0
+    while True:
+        for i in range(dim):
+            out[num,i] = mon[i]
+        num += 1
+        #The next monomial moves one from the last nonzero spot into the spot before it,
+        #and puts everything left over in that last nonzero spot at the end.
+        last = size-1
+        while last > 0 and mon[last] == 0:
+            last -= 1
+        if last == 0:
+            return num
+        left = mon[last] - 1
+        mon[last] = 0
+        mon[last-1] += 1
+        mon[size-1] = left
+
+def mon_combos_into(dim, deg, out, highest=False):
+    '''Writes the monomials up to a given degree into the rows of a preallocated array.
+
+    The monomials are enumerated straight into out by a compiled loop, with no intermediate
+    array. The rows are in the same order as mon_combos, or mon_combosHighest if highest is
+    True. Pass a reversed view (out[::-1]) to write them in reverse order.
+
+    Parameters
+    ----------
+    dim : int
+        The dimension of the desired monomials.
+    deg : int
+        The degree of the desired monomials.
+    out : numpy array
+        An array with dim columns and at least as many rows as there are monomials.
+    highest : bool
+        Defaults to False. If True only the monomials of degree exactly deg are written.
+
+    Returns
+    -------
+    num : int
+        The number of rows written.
+    '''
+    if deg < 0:
+        return 0
+    #The compiled loop doesn't check bounds, so make sure everything fits first.
+    num = num_mons(deg, dim) if highest else num_mons_full(deg, dim)
+    if out.ndim != 2 or out.shape[0] < num or out.shape[1] < dim:
+        raise ValueError('out needs at least {} rows and {} columns'.format(num, dim))
+    return _mon_combos_into(dim, deg, out, highest)
+
+def mon_combosHighest(mon, numLeft):
+    '''Finds all the monomials of a given degree and returns them.
 
     Very similar to mon_combos, but only returns the monomials of the desired degree.
 
     Parameters
     --------
     mon: list
-        A list of zeros, the length of which is the dimension of the desired monomials. Will change
-        as the function searches recursively.
+        A list of zeros, the length of which is the dimension of the desired monomials.
     numLeft : int
-        The degree of the monomials desired. Will decrease as the function searches recursively.
-    spot : int
-        The current position in the list the function is iterating through. Defaults to 0, but increases
-        in each step of the recursion.
+        The degree of the monomials desired.
 
     Returns
     -----------
     answers : list
         A list of all the monomials.
     '''
-    answers = list()
-    if len(mon) == spot+1: #We are at the end of mon, no more recursion.
-        mon[spot] = numLeft
-        answers.append(mon.copy())
-        return answers
-    if numLeft == 0: #Nothing else can be added.
-        answers.append(mon.copy())
-        return answers
-    temp = mon.copy() #Quicker than copying every time inside the loop.
-    for i in range(numLeft+1): #Recursively add to mon further down.
-        temp[spot] = i
-        answers += mon_combosHighest(temp, numLeft-i, spot+1)
-    return answers
-
-def mon_combos(mon, numLeft, spot = 0):
-    '''Finds all the monomials up to a given degree and returns them. Works recursively.
+    return list(mon_combos_highest_fast(len(mon), numLeft))
+
+def mon_combos(mon, numLeft):
+    '''Finds all the monomials up to a given degree and returns them.
 
     Parameters
     --------
     mon: list
-        A list of zeros, the length of which is the dimension of the desired monomials. Will change
-        as the function searches recursively.
+        A list of zeros, the length of which is the dimension of the desired monomials.
     numLeft : int
-        The degree of the monomials desired. Will decrease as the function searches recursively.
-    spot : int
-        The current position in the list the function is iterating through. Defaults to 0, but increases
-        in each step of the recursion.
+        The degree of the monomials desired.
 
     Returns
     -----------
     answers : list
         A list of all the monomials.
     '''
-    answers = list()
-    if len(mon) == spot+1: #We are at the end of mon, no more recursion.
-        for i in range(numLeft+1):
-            mon[spot] = i
-            answers.append(mon.copy())
-        return answers
-    if numLeft == 0: #Nothing else can be added.
-        answers.append(mon.copy())
-        return answers
-    temp = mon.copy() #Quicker than copying every time inside the loop.
-    for i in range(numLeft+1): #Recursively add to mon further down.
-        temp[spot] = i
-        answers += mon_combos(temp, numLeft-i, spot+1)
-    return answers
+    return list(mon_combos_fast(len(mon), numLeft))
 
 def num_mons_full(deg, dim):
     '''Returns the number of monomials of a certain dimension and less than or equal to a certian degree.
@@ -753,7 +934,7 @@ def num_mons_full(deg, dim):
     num_mons : int
         The number of monomials of the given degree and dimension.
     '''
-    return comb(deg+dim,dim,exact=True)
+    return comb(deg+dim,dim)
 
 def num_mons(deg, dim):
     '''Returns the number of monomials of a certain degree and dimension.
@@ -769,7 +950,7 @@ def num_mons(deg, dim):
     num_mons : int
         The number of monomials of the given degree and dimension.
     '''
-    return comb(deg+dim-1,deg,exact=True)
+    return comb(deg+dim-1,deg)
 
 def sort_polys_by_degree(polys, ascending = True):
     '''Sorts the polynomials by their degree.
@@ -786,11 +967,15 @@ def sort_polys_by_degree(polys, ascending = True):
     sorted_polys : list
         A list of the same polynomials, now sorted.
     '''
-    degs = [poly.degree for poly in polys]
-    argsort_list = np.argsort(degs)
-    sorted_polys = list()
-    for i in argsort_list:
-        sorted_polys.append(polys[i])
+    if len(polys) > 10**4:
+        argsort_list = np.argsort([poly.degree for poly in polys], kind='mergesort')
+        if not ascending:
+            argsort_list = argsort_list[::-1]
+        #Fill the object array elementwise so numpy doesn't try to look inside the polynomials.
+        polys_arr = np.empty(len(polys), dtype=object)
+        polys_arr[:] = polys
+        return polys_arr[argsort_list].tolist()
+    sorted_polys = sorted(polys, key=attrgetter('degree'))
     if ascending:
         return sorted_polys
     else:
@@ -969,11 +1154,11 @@ def memoize_permutaions(function):
 memoized_all_permutations = memoize_permutaions(all_permutations)
 
 def mons_ordered(dim, deg):
-    mons_ordered = []
+    mons_ordered = np.empty((num_mons_full(deg, dim), dim), dtype=int)
+    spot = 0
     for i in range(deg+1):
-        for j in mon_combosHighest([0]*dim,i):
-            mons_ordered.append(j)
-    return np.array(mons_ordered)
+        spot += mon_combos_into(dim, i, mons_ordered[spot:], highest=True)
+    return mons_ordered
 
 def cheb_perturbation3(mult_mon, mons, mon_dict, var):
     """